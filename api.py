@@ -1,15 +1,18 @@
+import io
 import sys
 import os
-import json
+import time
+import atexit
+import threading
+import orjson
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from datetime import datetime
-from flask import Flask, jsonify, request, send_file, Response
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.figure import Figure
+from flask import Flask, request, send_file, Response
 
 # Initialize the Flask app
 app = Flask(__name__)
-app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
 
 # Directory to store the data files
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
@@ -18,9 +21,25 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 VISUALIZATION_DIR = os.path.join(DATA_DIR, 'product_per_category')
 os.makedirs(VISUALIZATION_DIR, exist_ok=True)
 
+# orjson options shared by every JSON response: numpy scalars may come out of
+# pandas, and availability values used as keys are not always strings
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Number of products serialized at once when streaming the /products response
+STREAM_CHUNK_SIZE = 1000
+
+# Delay in seconds used to coalesce bursts of mutations into a single write to disk
+FLUSH_DELAY = 0.5
+
+# Low-cardinality columns stored with the pandas 'category' dtype
+CATEGORY_COLUMNS = ['brand', 'availability', 'category_path']
+
+# Derived columns precomputed at load time for search_products, never exposed by the API
+SEARCH_COLUMNS = ['_title_lower', '_desc_lower', '_pid_lower', '_colors_lower', '_sizes_set']
+
 def normalize_sizes(size_str):
     """
-    Replace underscores with dots in the sizes string.
+    Replace underscores with dots in the sizes string of a single product.
     Args:
         size_str (str): Size string containing underscores.
     Returns:
@@ -28,30 +47,215 @@ def normalize_sizes(size_str):
     """
     return size_str.replace('_', '.')
 
+def add_search_columns(frame):
+    """
+    Precompute the lowercased and tokenized columns used by search_products.
+
+    Args:
+        frame (pd.DataFrame): DataFrame with normalized sizes.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with the SEARCH_COLUMNS added.
+    """
+    # Columns left blank in every row are loaded as all-NaN floats, which have no
+    # .str accessor, so each column is coerced to strings first
+    frame['_title_lower'] = frame['title'].fillna('').astype(str).str.lower()
+    frame['_desc_lower'] = frame['description'].fillna('').astype(str).str.lower()
+    frame['_pid_lower'] = frame['product_id'].fillna('').astype(str).str.lower()
+    frame['_colors_lower'] = frame['colors'].fillna('').astype(str).str.lower()
+    frame['_sizes_set'] = frame['sizes'].fillna('').astype(str).str.split(', ').map(
+        lambda sizes: frozenset(size for size in sizes if size))
+    return frame
+
+def add_categories(frame, values):
+    """
+    Extend the categories of the CATEGORY_COLUMNS so that new values can be stored in them.
+
+    Args:
+        frame (pd.DataFrame): DataFrame with categorical CATEGORY_COLUMNS.
+        values (dict): Column names mapped to the values about to be stored.
+    """
+    for column in CATEGORY_COLUMNS:
+        value = values.get(column)
+        if column in frame.columns and not pd.isna(value) and value not in frame[column].cat.categories:
+            frame[column] = frame[column].cat.add_categories([value])
+
+def sort_key(column):
+    """
+    Sort categorical columns by their values rather than by the order of their categories.
+
+    Args:
+        column (pd.Series): Column being sorted.
+
+    Returns:
+        pd.Series: Column to sort by.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.astype(object)
+    return column
+
+def public_columns(frame):
+    """
+    List the dataset columns of a DataFrame, leaving out the derived search columns.
+
+    Args:
+        frame (pd.DataFrame): DataFrame holding products.
+
+    Returns:
+        list: Column names to expose through the API or write back to file.
+    """
+    return [column for column in frame.columns if column not in SEARCH_COLUMNS]
+
+def build_pid_index(frame):
+    """
+    Map every product ID to the label of its row for constant-time lookups.
+
+    Args:
+        frame (pd.DataFrame): DataFrame with the search columns added.
+
+    Returns:
+        dict: Lowercased, stripped product IDs mapped to their row labels.
+    """
+    return dict(zip(frame['_pid_lower'].str.strip(), frame.index))
+
+def save_data(frame, file_path):
+    """
+    Write the dataset columns of a DataFrame to a file, replacing it atomically.
+
+    Args:
+        frame (pd.DataFrame): DataFrame holding products.
+        file_path (str): Path of the file to write.
+
+    Raises:
+        ValueError: If the file format is unsupported.
+    """
+    tmp_path = f'{file_path}.tmp'
+    if file_path.endswith('.csv'):
+        frame[public_columns(frame)].to_csv(tmp_path, index=False)
+    elif file_path.endswith('.jsonl'):
+        frame[public_columns(frame)].to_json(tmp_path, orient='records', lines=True, force_ascii=False)
+    elif file_path.endswith('.json'):
+        frame[public_columns(frame)].to_json(tmp_path, orient='records', force_ascii=False)
+    else:
+        raise ValueError("Unsupported file format")
+    os.replace(tmp_path, file_path)
+
+def append_data(frame, file_path):
+    """
+    Append the dataset columns of new rows to the end of a CSV or JSON Lines file.
+
+    Args:
+        frame (pd.DataFrame): DataFrame holding the new products.
+        file_path (str): Path of the file to append to.
+
+    Raises:
+        ValueError: If the file format does not support appending.
+    """
+    if file_path.endswith('.csv'):
+        frame[public_columns(frame)].to_csv(file_path, mode='a', header=False, index=False)
+    elif file_path.endswith('.jsonl'):
+        frame[public_columns(frame)].to_json(file_path, orient='records', lines=True, force_ascii=False, mode='a')
+    else:
+        raise ValueError("Unsupported file format")
+
+def json_response(data, status=200):
+    """
+    Serialize data with orjson into a compact JSON response.
+
+    Args:
+        data: Object to serialize.
+        status (int): HTTP status code of the response.
+
+    Returns:
+        flask.Response: JSON response.
+    """
+    return Response(orjson.dumps(data, option=ORJSON_OPTIONS), status=status, mimetype='application/json')
+
+def stream_products(frame):
+    """
+    Serialize products as JSON chunk by chunk, so the full response is never held in memory.
+
+    Args:
+        frame (pd.DataFrame): DataFrame holding products.
+
+    Yields:
+        bytes: Consecutive pieces of the JSON document.
+    """
+    frame = frame[public_columns(frame)]
+    yield b'{"total_products":%d,"products":[' % len(frame)
+    for start in range(0, len(frame), STREAM_CHUNK_SIZE):
+        records = frame.iloc[start:start + STREAM_CHUNK_SIZE].to_dict(orient='records')
+        chunk = orjson.dumps(records, option=ORJSON_OPTIONS)[1:-1]
+        yield chunk if start == 0 else b',' + chunk
+    yield b']}'
+
+def render_visualization(frame):
+    """
+    Render a bar chart of the number of products per category as a PNG image.
+
+    The figure is built without pyplot, whose global state is not thread-safe,
+    so it can be rendered from worker threads.
+
+    Args:
+        frame (pd.DataFrame): DataFrame holding products.
+
+    Returns:
+        bytes: PNG image.
+    """
+    # Initialize the visualization plot, most populated categories on top
+    counts = frame['category_path'].value_counts()
+    counts = counts[counts > 0]  # Categories left without products after updates or deletions
+    fig = Figure(figsize=(10, 7))
+    ax = fig.subplots()
+    ax.barh(counts.index[::-1], counts.values[::-1])
+    ax.set_title('Product Count by Category')
+    ax.set_xlabel('Product Count')
+    ax.set_ylabel('Category Path')
+
+    # Render the visualization plot as PNG
+    buffer = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
 def load_data(file_name):
     """
-    Load data from a file and normalize sizes.
+    Load data from a file, normalize sizes and precompute the search columns.
 
     Args:
         file_name (str): Name of the file to load.
 
     Returns:
-        pd.DataFrame: DataFrame with normalized sizes.
+        pd.DataFrame: DataFrame with normalized sizes and search columns.
 
     Raises:
         ValueError: If the file format is unsupported.
     """
     file_path = os.path.join(DATA_DIR, file_name)
     if file_path.endswith('.csv'):
-        df = pd.read_csv(file_path)
+        # Parse with the multithreaded pyarrow reader, keeping product IDs and sizes as written
+        df = pd.read_csv(file_path, engine='pyarrow', dtype={'product_id': str, 'sizes': 'string'})
+    elif file_path.endswith('.jsonl'):
+        df = pd.read_json(file_path, lines=True, dtype={'sizes': object})
     elif file_path.endswith('.json'):
-        df = pd.read_json(file_path, orient='records')
+        df = pd.read_json(file_path, orient='records', dtype={'sizes': object})
     else:
         raise ValueError("Unsupported file format")
     
-    # Normalize the 'sizes' column immediately after loading
-    df['sizes'] = df['sizes'].apply(normalize_sizes)
-    return df
+    # Normalize the 'sizes' column immediately after loading, in one vectorized pass.
+    # Sizes are read as text, otherwise a single size per row such as 42 or 40.5 would
+    # be parsed as a number and a column blank in every row as floats, and stored back
+    # as objects with NaN for missing values like the other text columns
+    df['sizes'] = df['sizes'].str.replace('_', '.', regex=False).to_numpy(dtype=object, na_value=np.nan)
+    # Convert prices to float and product IDs to strings once, instead of on every request
+    df['current_price'] = pd.to_numeric(df['current_price'], errors='coerce')
+    df['original_price'] = pd.to_numeric(df['original_price'], errors='coerce')
+    df['product_id'] = df['product_id'].astype(str)
+    # Store repeated values as integer codes, which also speeds up grouping by them
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return add_search_columns(df)
 
 # Check if the file name argument is provided
 if len(sys.argv) != 2:
@@ -62,6 +266,9 @@ if len(sys.argv) != 2:
 data_file = sys.argv[1]
 data_path = os.path.join(DATA_DIR, data_file)
 
+# A single visualization image per data file, overwritten whenever the data changes
+visualization_file_name = f'products_per_category_{os.path.splitext(os.path.basename(data_file))[0]}.png'
+
 # Check if the file exists in the data directory
 if not os.path.exists(data_path):
     print(f"Error: File {data_path} not found.")
@@ -69,26 +276,204 @@ if not os.path.exists(data_path):
 
 try:
     df = load_data(data_file)
+    pid_index = build_pid_index(df)
 except Exception as e:
     print(f"Error loading data: {e}")
     sys.exit(1)
 
+# Mutations update df in memory under _lock and set _dirty, the flusher thread
+# then persists them to disk in the background
+_dirty = threading.Event()
+_lock = threading.Lock()
+
+# Labels of rows added since the last flush, and whether the whole file has to
+# be rewritten because existing rows were updated or deleted
+_pending_rows = []
+_rewrite_needed = False
+
+# Incremented on every mutation, responses derived from df are cached against it
+_data_version = 0
+_summary_cache = (None, -1)
+_visualization_cache = (None, -1)
+
+# Search text masks of the latest data version, keyed by column and query
+TEXT_MASK_CACHE_SIZE = 256
+_text_mask_cache = ({}, -1)
+_size_bitmap_cache = (None, -1)
+
+# Renders the visualization in the background after every mutation
+_visualization_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='visualization')
+_visualization_lock = threading.Lock()
+
+def schedule_append(label):
+    """
+    Record a new row so the next flush only appends it to the data file.
+    Must be called while holding _lock, right after df is replaced, so readers
+    taking df and _data_version under _lock always get a matching pair.
+
+    Args:
+        label: Label of the row added to df.
+    """
+    global _data_version
+    _data_version += 1
+    _pending_rows.append(label)
+    _dirty.set()
+    _visualization_executor.submit(regenerate_visualization, _data_version)
+
+def schedule_rewrite():
+    """
+    Record a change to existing rows so the next flush rewrites the data file.
+    Must be called while holding _lock, right after df is changed, so readers
+    taking df and _data_version under _lock always get a matching pair.
+    """
+    global _rewrite_needed, _data_version
+    _data_version += 1
+    _rewrite_needed = True
+    _dirty.set()
+    _visualization_executor.submit(regenerate_visualization, _data_version)
+
+def regenerate_visualization(version, force=False):
+    """
+    Render the visualization for a data version, cache it and save it to the visualization directory.
+
+    Args:
+        version (int): Value of _data_version the visualization is rendered for.
+        force (bool): Render even if a newer data version is already pending.
+
+    Returns:
+        bytes: PNG image, or None if the render was skipped.
+    """
+    global _visualization_cache
+    # Coalesce bursts of mutations, only the latest version has to be rendered
+    if not force and version != _data_version:
+        return None
+
+    image_bytes = render_visualization(df)
+    with _visualization_lock:
+        if version > _visualization_cache[1]:
+            _visualization_cache = (image_bytes, version)
+            with open(os.path.join(VISUALIZATION_DIR, visualization_file_name), 'wb') as image_file:
+                image_file.write(image_bytes)
+    return image_bytes
+
+def text_mask(frame, column, query, version):
+    """
+    Match a lowercased query as a literal substring of a lowercased search column.
+
+    Masks are only cached for the latest data version, so a mask computed before
+    a mutation is never reused, and are always computed from the caller's snapshot.
+
+    Args:
+        frame (pd.DataFrame): Snapshot of df taken together with version.
+        column (str): Name of one of the SEARCH_COLUMNS holding lowercased text.
+        query (str): Lowercased substring to look for.
+        version (int): Value of _data_version frame was taken at.
+
+    Returns:
+        np.ndarray: Read-only boolean mask over the rows of frame.
+    """
+    global _text_mask_cache
+    masks, cached_version = _text_mask_cache
+    if cached_version == version:
+        mask = masks.get((column, query))
+        if mask is not None:
+            return mask
+
+    mask = frame[column].str.contains(query, regex=False, na=False).to_numpy(dtype=bool)
+    mask.flags.writeable = False
+    # Masks of an older version are not worth keeping once the data has changed.
+    # The cache is replaced rather than cleared, as other threads may be reading it
+    if version < cached_version:
+        return mask
+    if version > cached_version or len(masks) >= TEXT_MASK_CACHE_SIZE:
+        masks = {}
+        _text_mask_cache = (masks, version)
+    masks[(column, query)] = mask
+    return mask
+
+def size_bitmap(frame, version):
+    """
+    Encode the sizes of every product as a row of bits, one bit per distinct size.
+
+    The bitmap is rebuilt once per data version instead of splitting sizes on every search,
+    always from the caller's snapshot.
+
+    Args:
+        frame (pd.DataFrame): Snapshot of df taken together with version.
+        version (int): Value of _data_version frame was taken at.
+
+    Returns:
+        tuple: Dict mapping each size to its bit position, and a uint64 array
+        with one row per product and one column per 64 distinct sizes.
+    """
+    global _size_bitmap_cache
+    bitmap, cached_version = _size_bitmap_cache
+    if cached_version == version:
+        return bitmap
+
+    size_sets = frame['_sizes_set']
+    lengths = size_sets.map(len).to_numpy()
+    codes, sizes = pd.factorize(pd.Series([size for size_set in size_sets for size in size_set], dtype=object))
+    rows = np.repeat(np.arange(len(size_sets)), lengths)
+
+    bits = np.zeros((len(size_sets), max(1, (len(sizes) + 63) // 64)), dtype=np.uint64)
+    np.bitwise_or.at(bits, (rows, codes // 64), np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+    bitmap = ({size: code for code, size in enumerate(sizes)}, bits)
+    if version > cached_version:
+        _size_bitmap_cache = (bitmap, version)
+    return bitmap
+
+def flush_data():
+    """
+    Persist the changes made to df since the last flush.
+
+    New rows are appended to CSV and JSON Lines files, any other change (or any
+    change to a JSON array file, which cannot be appended to) rewrites the whole file.
+    """
+    global _rewrite_needed
+    with _lock:
+        if not _dirty.is_set():
+            return
+        _dirty.clear()
+        try:
+            if _rewrite_needed or data_path.endswith('.json'):
+                save_data(df, data_path)
+            else:
+                append_data(df.loc[_pending_rows], data_path)
+        except Exception:
+            app.logger.exception('Failed to write data to %s', data_path)
+            # Restore the whole file on the next flush
+            _rewrite_needed = True
+            return
+        _pending_rows.clear()
+        _rewrite_needed = False
+
+def _flusher():
+    """
+    Wait for mutations and flush them, coalescing those made within FLUSH_DELAY.
+    """
+    while True:
+        _dirty.wait()
+        time.sleep(FLUSH_DELAY)
+        flush_data()
+
+# The debug server runs without its reloader (see app.run below), so a single
+# process loads the data, runs the flusher and renders the visualization
+threading.Thread(target=_flusher, name='data-flusher', daemon=True).start()
+atexit.register(flush_data)
+
+# Have the visualization of the loaded data ready before the first request
+_visualization_executor.submit(regenerate_visualization, _data_version)
+
 @app.route('/products', methods=['GET'])
 def get_products():
     """
     Retrieve all products and total count.
 
     Returns:
-        flask.Response: JSON response containing total product count and products.
+        flask.Response: Streamed JSON response containing total product count and products.
     """
-    products_json = df.to_dict(orient='records')
-    total_products = len(products_json)
-    response_data = {
-        "total_products": total_products,
-        "products": products_json
-    }
-    response_str = json.dumps(response_data, indent=4)
-    return Response(response_str, mimetype='application/json')
+    return Response(stream_products(df), mimetype='application/json')
 
 @app.route('/products/search', methods=['GET'])
 def search_products():
@@ -110,77 +495,99 @@ def search_products():
         flask.Response: JSON response containing the filtered products or an error message.
     """
     query_params = request.args
-    filtered_df = df.copy()
 
-    # Text search on Title or Description
+    # Take df and its version together under _lock, so every filter below works on
+    # the same rows even if a product is added or deleted while the search runs
+    with _lock:
+        frame, version = df, _data_version
+
+    # Compose every active filter into a single boolean mask over the snapshot,
+    # then slice once at the end instead of copying it per request
+    mask = np.ones(len(frame), dtype=bool)
+
+    # Text search on Title or Description, repeated queries reuse their cached masks
     title_query = query_params.get('title')
     description_query = query_params.get('description')
     product_id_query = query_params.get('product_id')
     if title_query:
-        filtered_df = filtered_df[filtered_df['title'].str.contains(title_query, case=False, na=False)]
+        mask &= text_mask(frame, '_title_lower', title_query.lower(), version)
     if description_query:
-        filtered_df = filtered_df[filtered_df['description'].str.contains(description_query, case=False, na=False)]
+        mask &= text_mask(frame, '_desc_lower', description_query.lower(), version)
     if product_id_query:
-        filtered_df = filtered_df[filtered_df['product_id'].str.contains(product_id_query, case=False, na=False)]
+        mask &= text_mask(frame, '_pid_lower', product_id_query.lower(), version)
 
     # Range filters for price
     min_price = query_params.get('min_price', type=float)
     max_price = query_params.get('max_price', type=float)
     if min_price is not None:
-        filtered_df = filtered_df[filtered_df['current_price'] >= min_price]
+        mask &= (frame['current_price'] >= min_price).values
     if max_price is not None:
-        filtered_df = filtered_df[filtered_df['current_price'] <= max_price]
+        mask &= (frame['current_price'] <= max_price).values
 
     # Multiple values filtering for Colors and Sizes both of them expected to be comma-separated
+    # Sizes are already normalized in load_data, so no per-request normalization is needed
     colors = query_params.get('colors')
     sizes = query_params.get('sizes')
-    filtered_df['sizes'] = filtered_df['sizes'].apply(normalize_sizes)
-
     if colors:
         color_list = [color.strip().lower() for color in colors.split(',')]
-        filtered_df = filtered_df[filtered_df['colors'].str.lower().apply(lambda x: any(color in x for color in color_list))]
+        mask &= frame['_colors_lower'].map(lambda x: any(color in x for color in color_list)).values.astype(bool)
     if sizes:
-        size_list = [size.strip() for size in sizes.split(',')]
-        filtered_df = filtered_df[filtered_df['sizes'].apply(lambda x: any(size in x.split(', ') for size in size_list))]
+        # Keep products having any bit of the requested sizes set
+        size_codes, bits = size_bitmap(frame, version)
+        query_bits = np.zeros(bits.shape[1], dtype=np.uint64)
+        for size in sizes.split(','):
+            code = size_codes.get(size.strip())
+            if code is not None:
+                query_bits[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+        mask &= (bits & query_bits).any(axis=1)
 
     # Sort handling
     sort_by = query_params.get('sort_by', 'title')  # Default sort by title
     sort_order = query_params.get('sort_order', 'asc') == 'asc'
-    filtered_df = filtered_df.sort_values(by=sort_by, ascending=sort_order)
+    filtered_df = frame.loc[mask, public_columns(frame)].sort_values(by=sort_by, ascending=sort_order, key=sort_key)
 
     if filtered_df.empty:
-        return jsonify({'error': 'No products found matching the criteria'}), 404
+        return json_response({'error': 'No products found matching the criteria'}, 404)
 
     products_json = filtered_df.to_dict(orient='records')
-    return jsonify({"products": products_json})
+    return json_response({"products": products_json})
 
 @app.route('/products/summary', methods=['GET'])
 def products_summary():
     """
     Generate a summary of product counts, average prices, and availability per category.
 
+    The response is cached until the data changes.
+
     Returns:
         flask.Response: JSON response containing a summary of products grouped by category.
     """
-    # Convert 'current_price' to float to ensure calculations work properly
-    df['current_price'] = pd.to_numeric(df['current_price'], errors='coerce')
-
-    # Now calculate the category counts, average price, and availability counts
-    category_counts = df['category_path'].value_counts().to_dict()
-    price_average = df.groupby('category_path')['current_price'].mean().round(2).to_dict()
-    availability_count = df.groupby('category_path')['availability'].value_counts().unstack(fill_value=0).to_dict(orient='index')
+    global _summary_cache
+    version = _data_version
+    cached_body, cached_version = _summary_cache
+    if cached_version == version:
+        return Response(cached_body, mimetype='application/json')
+
+    # Category counts and average prices in a single groupby pass, most populated categories first
+    category_stats = (df.groupby('category_path', sort=False, observed=True)['current_price']
+                      .agg(['size', 'mean'])
+                      .sort_values('size', ascending=False, kind='stable'))
+    availability_count = (df.groupby(['category_path', 'availability'], sort=False, observed=True)
+                          .size().unstack(fill_value=0).to_dict(orient='index'))
 
     summary_data = []
-    for category in category_counts.keys():
+    for category, product_count, average_price in category_stats.itertuples():
         summary_entry = {
             "category_path": category,
-            "product_count": category_counts[category],
-            "average_price": price_average.get(category, 0),
+            "product_count": product_count,
+            "average_price": round(average_price, 2),
             "availability": availability_count.get(category, {})
         }
         summary_data.append(summary_entry)
 
-    return jsonify(summary_data)
+    response = json_response(summary_data)
+    _summary_cache = (response.get_data(), version)
+    return response
 
 @app.route('/products/create', methods=['POST'])
 def add_product():
@@ -209,76 +616,73 @@ def add_product():
         flask.Response: JSON response with the new product information or an error message.
     """
     if not request.json:
-        return jsonify({'error': 'No JSON payload provided.'}), 400
+        return json_response({'error': 'No JSON payload provided.'}, 400)
 
     required_fields = ["product_id", "title", "brand", "description", "current_price",
                        "original_price", "availability", "image_urls", "colors", "sizes", "category_path", "url"]
 
     missing_fields = [field for field in required_fields if field not in request.json]
     if missing_fields:
-        return jsonify({'error': 'Missing required fields', 'missing': missing_fields}), 400
+        return json_response({'error': 'Missing required fields', 'missing': missing_fields}, 400)
 
     new_product = {k: str(v).strip() if isinstance(v, str) else str(v) for k, v in request.json.items()}
+    new_product['current_price'] = pd.to_numeric(new_product['current_price'], errors='coerce')  # Convert to numeric, NaN if invalid
     new_product['original_price'] = pd.to_numeric(new_product['original_price'], errors='coerce')  # Convert to numeric, NaN if invalid
-    new_product_df = pd.DataFrame([new_product])
+    new_product['sizes'] = normalize_sizes(new_product['sizes'])
 
     global df  # Global df variable to update dataframe loaded at start
 
     try:
-        # Ensure all data used for comparison or manipulation as strings are indeed strings
-        df['product_id'] = df['product_id'].astype(str)
-        new_product['product_id'] = str(new_product['product_id'])
-
-        # Check for duplicate entries based on 'product_id'
-        if df['product_id'].str.lower().str.strip().isin([new_product['product_id'].lower().strip()]).any():
-            return jsonify({'error': 'Duplicate entry: Product with this ID already exists.'}), 409
-
-        # Add new product to dataframe
-        df = pd.concat([df, new_product_df], ignore_index=True)
-
-        # Write updated dataframe back to file
-        if data_file.endswith('.csv'):
-            df.to_csv(data_file, index=False)
-        elif data_file.endswith('.json'):
-            df.to_json(data_file, orient='records')
-        else:
-            raise ValueError("Unsupported file format")
+        with _lock:
+            # Check for duplicate entries based on 'product_id', product_id being
+            # already coerced to str at load time and in the payload above
+            candidate = new_product['product_id'].lower().strip()
+            if candidate in pid_index:
+                return json_response({'error': 'Duplicate entry: Product with this ID already exists.'}, 409)
+
+            # Add new product to dataframe under the next row label, keeping the
+            # existing labels stable for pid_index. Fields that are not columns of
+            # the dataset are ignored, as in updates
+            new_label = df.index[-1] + 1 if len(df) else 0
+            new_product_df = add_search_columns(
+                pd.DataFrame([new_product], columns=public_columns(df), index=[new_label]))
+            add_categories(df, new_product)
+            new_product_df = new_product_df.astype(
+                {column: df[column].dtype for column in CATEGORY_COLUMNS if column in df.columns})
+            df = pd.concat([df, new_product_df])
+            pid_index[candidate] = new_label
+            # Respond with the product as stored, without the ignored fields
+            new_product = {column: new_product.get(column) for column in public_columns(df)}
+
+            # Let the flusher append the new product to the file
+            schedule_append(new_label)
 
     except Exception as e:
-        return jsonify({'error': 'Failed to add product.', 'exception': str(e)}), 500
+        return json_response({'error': 'Failed to add product.', 'exception': str(e)}, 500)
 
-    return jsonify(new_product), 201
+    return json_response(new_product, 201)
 
 @app.route('/products/visualization', methods=['GET'])
 def products_visualization():
     """
     Generate and return a bar chart visualization of the number of products per category.
 
-    This function uses seaborn and matplotlib to generate a bar chart showing the count of products grouped by their category path. The resulting image is saved to the `product_per_category` sub-directory inside the `data` directory.
+    This function uses matplotlib to generate a bar chart showing the count of products grouped by their category path. The resulting image is saved to the `product_per_category` sub-directory inside the `data` directory, overwriting the previous image for the same data file.
+
+    The image is rendered in the background whenever the data changes, and only
+    rendered within the request when no image for the current data is cached yet.
 
     Returns:
         flask.Response: Image file as a downloadable PNG file.
     """
-    # Initialize the visualization plot
-    fig, ax = plt.subplots(figsize=(10, 7))
-    sns.countplot(y='category_path', data=df, ax=ax, order=df['category_path'].value_counts().index)
-    ax.set_title('Product Count by Category')
-    ax.set_xlabel('Product Count')
-    ax.set_ylabel('Category Path')
-
-    # Generate a unique filename based on data file name and the current timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    base_filename = os.path.splitext(os.path.basename(data_file))[0]
-    image_file_name = f'products_per_category_{base_filename}_{timestamp}.png'
-    image_path = os.path.join(VISUALIZATION_DIR, image_file_name)
-
-    # Save the visualization plot as a PNG file and close the plot
-    plt.tight_layout()
-    plt.savefig(image_path)
-    plt.close(fig)
+    version = _data_version
+    image_bytes, cached_version = _visualization_cache
+    if cached_version != version:
+        image_bytes = regenerate_visualization(version, force=True)
 
     # Serve the image as a file download
-    return send_file(image_path, mimetype='image/png', as_attachment=True)
+    return send_file(io.BytesIO(image_bytes), mimetype='image/png', as_attachment=True,
+                     download_name=visualization_file_name)
 
 
 @app.route('/products/<product_id>', methods=['PUT', 'DELETE'])
@@ -305,49 +709,48 @@ def modify_or_delete_product(product_id):
     global df  # Reference the global DataFrame
 
     try:
-        # Reload and ensure 'product_id' is a string
-        if data_file.endswith('.csv'):
-            df = pd.read_csv(data_file)
-        elif data_file.endswith('.json'):
-            df = pd.read_json(data_file, orient='records')
-
-        df['product_id'] = df['product_id'].astype(str)  # Ensure `product_id` is treated as a string
-        df['original_price'] = pd.to_numeric(df['original_price'], errors='coerce')  # Handle non-numeric gracefully
-
-        # Look for the product idx with case insensitive matching
-        product_idx = df[df['product_id'].str.lower() == product_id.lower()].index
-        if product_idx.empty:
-            return jsonify({'error': 'Product not found'}), 404
-
-        # Update the product information if the method is PUT
-        if request.method == 'PUT':
-            update_fields = request.json
-            update_fields['original_price'] = pd.to_numeric(update_fields.get('original_price'), errors='coerce')
-            for key, value in request.json.items():
-                if key in df.columns and key != 'product_id':
-                    df.at[product_idx.item(), key] = value.strip() if isinstance(value, str) else value
-
-            # Save changes from df back to the file
-            if data_file.endswith('.csv'):
-                df.to_csv(data_file, index=False)
-            elif data_file.endswith('.json'):
-                df.to_json(data_file, orient='records', lines=False, force_ascii=False)
-            
-            return jsonify({'message': 'Product updated successfully'}), 200
-        
-        # Delete the product if the method is DELETE
-        elif request.method == 'DELETE':
-            df = df.drop(index=product_idx)
-            if data_file.endswith('.csv'):
-                df.to_csv(data_file, index=False)
-            elif data_file.endswith('.json'):
-                df.to_json(data_file, orient='records', lines=False, force_ascii=False)
-            
-            return jsonify({'message': 'Product deleted successfully'}), 200
+        with _lock:
+            # Look for the product idx with case insensitive matching
+            product_key = product_id.lower().strip()
+            product_idx = pid_index.get(product_key)
+            if product_idx is None:
+                return json_response({'error': 'Product not found'}, 404)
+
+            # Update the product information if the method is PUT
+            if request.method == 'PUT':
+                update_fields = request.json
+                for price_field in ('current_price', 'original_price'):
+                    if price_field in update_fields:
+                        update_fields[price_field] = pd.to_numeric(update_fields[price_field], errors='coerce')
+                if isinstance(update_fields.get('sizes'), str):
+                    update_fields['sizes'] = normalize_sizes(update_fields['sizes'])
+                updates = {key: value.strip() if isinstance(value, str) else value
+                           for key, value in update_fields.items() if key in df.columns and key != 'product_id'}
+                add_categories(df, updates)
+                for key, value in updates.items():
+                    df.at[product_idx, key] = value
+
+                # Keep the precomputed search columns in sync with the updated row
+                updated_row = add_search_columns(df.loc[[product_idx]].copy())
+                for column in SEARCH_COLUMNS:
+                    df.at[product_idx, column] = updated_row.at[product_idx, column]
+
+                # Let the flusher save changes from df back to the file
+                schedule_rewrite()
+                return json_response({'message': 'Product updated successfully'}, 200)
+
+            # Delete the product if the method is DELETE
+            elif request.method == 'DELETE':
+                df = df.drop(index=product_idx)
+                del pid_index[product_key]
+                schedule_rewrite()
+                return json_response({'message': 'Product deleted successfully'}, 200)
 
     except Exception as e:
-        return jsonify({'error': 'Failed to modify or delete product', 'exception': str(e)}), 500
+        return json_response({'error': 'Failed to modify or delete product', 'exception': str(e)}, 500)
 
 
 if __name__ == '__main__':
-    app.run(debug=True)  # Run the application
+    # The reloader would run this module in a second process, with its own flusher
+    # and visualization render writing to the same files
+    app.run(debug=True, use_reloader=False)  # Run the application
@@ -4,6 +4,8 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.defer import DeferredSemaphore
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -101,3 +103,55 @@ class DataCollectionProjectDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class PerDomainConcurrencyMiddleware:
+    """
+        Downloader middleware limiting the requests in flight to each domain.
+
+        Every domain gets a DeferredSemaphore of PER_DOMAIN_MAX_CONCURRENCY slots. A request
+        waits for a slot before going on to the downloader, and releases it once its response
+        or exception comes back, so a single site sees a steady number of connections while
+        the global CONCURRENT_REQUESTS stays high for the rest.
+    """
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.semaphores = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.getint('PER_DOMAIN_MAX_CONCURRENCY', 16))
+
+    def process_request(self, request, spider):
+        """
+            Wait for a free slot of the request's domain.
+
+            Returns:
+                Deferred: Fires with None, letting the request continue, once a slot is acquired.
+        """
+        domain = urlparse_cached(request).netloc
+        if domain not in self.semaphores:
+            self.semaphores[domain] = DeferredSemaphore(self.max_concurrency)
+        request.meta['per_domain_slot'] = domain
+        return self.semaphores[domain].acquire().addCallback(lambda _: None)
+
+    def process_response(self, request, response, spider):
+        """
+            Release the slot of the request's domain when its response is received.
+        """
+        self.release(request)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        """
+            Release the slot of the request's domain when its download fails.
+        """
+        self.release(request)
+
+    def release(self, request):
+        """
+            Release the slot held by a request, if any, so it is only released once.
+        """
+        domain = request.meta.pop('per_domain_slot', None)
+        if domain is not None:
+            self.semaphores[domain].release()
@@ -1,37 +1,310 @@
 import csv
-import json
+import hashlib
 import os
+import sqlite3
+import orjson
+from twisted.internet.defer import Deferred, DeferredSemaphore, succeed
+from twisted.internet.threads import deferToThread
 
 # Create the data directory if it doesn't already exist
 data_dir = os.path.join(os.path.dirname(__file__), '../data')
 os.makedirs(data_dir, exist_ok=True)
 
+# Number of rows buffered by CsvPipeline before writing them in one batch
+CSV_BATCH_SIZE = 500
+
+# Descriptions translated per request, and seconds to wait before translating an incomplete batch
+TRANSLATION_BATCH_SIZE = 32
+TRANSLATION_FLUSH_DELAY = 1.0
+
+# Maximum number of batches translated at the same time in the reactor thread pool
+TRANSLATION_CONCURRENCY = 4
+
+# Common English words whose presence marks a description as already translated
+ENGLISH_STOPWORDS = (' the ', ' and ', ' with ', ' for ')
+
+def needs_translation(text):
+    """
+        Cheaply guess whether a description still has to be translated from Spanish.
+
+        Texts shorter than 3 characters are skipped, mostly non-ASCII texts are translated,
+        and otherwise only texts without common English words are translated.
+
+        Args:
+            text (str): Description to check.
+
+        Returns:
+            bool: True if the description should be translated.
+    """
+    if len(text) < 3:
+        return False
+    if sum(ord(char) < 128 for char in text) / len(text) < 0.9:
+        return True
+    padded_text = f' {text.lower()} '
+    return not any(word in padded_text for word in ENGLISH_STOPWORDS)
+
+class LocalTranslator:
+    """
+        Spanish to English translator running a CTranslate2 conversion of Helsinki-NLP/opus-mt-es-en.
+
+        The model directory is created once with:
+            ct2-transformers-converter --model Helsinki-NLP/opus-mt-es-en --output_dir es-en-ct2
+                                       --quantization int8 --copy_files source.spm target.spm
+    """
+    def __init__(self, model_dir):
+        """
+            Load the model and its SentencePiece tokenizers from model_dir.
+        """
+        import ctranslate2
+        import sentencepiece
+
+        self.translator = ctranslate2.Translator(model_dir, compute_type='int8',
+                                                 inter_threads=1, intra_threads=os.cpu_count())
+        self.source_tokenizer = sentencepiece.SentencePieceProcessor(model_file=os.path.join(model_dir, 'source.spm'))
+        self.target_tokenizer = sentencepiece.SentencePieceProcessor(model_file=os.path.join(model_dir, 'target.spm'))
+
+    def translate(self, texts):
+        """
+            Translate a batch of Spanish texts to English.
+
+            Args:
+                texts (list of str): Texts to translate.
+
+            Returns:
+                list of str: The translations, in the same order.
+        """
+        tokens = [self.source_tokenizer.encode(text, out_type=str) + ['</s>'] for text in texts]
+        results = self.translator.translate_batch(tokens, beam_size=1, max_batch_size=TRANSLATION_BATCH_SIZE)
+        return [self.target_tokenizer.decode(result.hypotheses[0]) for result in results]
+
+class TranslationPipeline:
+    """
+        Pipeline for translating item descriptions from Spanish to English.
+
+        Descriptions are translated in batches of TRANSLATION_BATCH_SIZE in the reactor thread
+        pool, at most TRANSLATION_CONCURRENCY batches at once. Translations are cached in memory
+        and in a SQLite translation memory, so each description is only translated once.
+        Set TRANSLATION_MODEL_DIR to translate locally with LocalTranslator instead of googletrans.
+    """
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.get('TRANSLATION_MODEL_DIR'))
+
+    def open_spider(self, spider):
+        """
+            Create the translator, the translation caches, the queue of pending descriptions and the
+            map of descriptions in flight to the deferreds waiting for them.
+        """
+        if self.model_dir:
+            self.translator = LocalTranslator(self.model_dir)
+        else:
+            # Imported here so spiders that do not translate skip loading googletrans and httpx
+            from googletrans import Translator
+            self.translator = Translator()
+        self.cache = {}
+        self.memory = sqlite3.connect(os.path.join(data_dir, 'translations.sqlite3'))
+        self.memory.execute('CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL)')
+        self.pending = []
+        self.inflight = {}
+        self.flush_call = None
+        self.semaphore = DeferredSemaphore(TRANSLATION_CONCURRENCY)
+
+    def close_spider(self, spider):
+        """
+            Translate pending descriptions and close the translation memory when the spider closes.
+        """
+        return self.flush(spider).addBoth(lambda _: self.memory.close())
+
+    def process_item(self, item, spider):
+        """
+            Translate the description of an item, from the cache or within the next batch.
+
+            Args:
+                item: The item scraped.
+                spider: The spider that scraped the item.
+
+            Returns:
+                The item if its description is cached, otherwise a Deferred firing with the
+                item once its batch has been translated.
+        """
+        description = item.get('description')
+        if not description or not needs_translation(description):
+            return item
+        translation = self.lookup(description)
+        if translation is not None:
+            item['description'] = translation
+            return item
+
+        deferred = Deferred()
+        deferred.addCallback(self.set_description, item)
+        if description in self.inflight:
+            self.inflight[description].append(deferred)
+            return deferred
+        self.inflight[description] = [deferred]
+        self.pending.append(description)
+
+        if len(self.pending) >= TRANSLATION_BATCH_SIZE:
+            self.flush(spider)
+        elif self.flush_call is None:
+            from twisted.internet import reactor
+            self.flush_call = reactor.callLater(TRANSLATION_FLUSH_DELAY, self.flush, spider)
+        return deferred
+
+    def flush(self, spider):
+        """
+            Translate the pending descriptions as one batch in a thread.
+
+            Returns:
+                Deferred: Fires once the batch is translated and its items are released.
+        """
+        if self.flush_call is not None and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+
+        texts, self.pending = self.pending, []
+        if texts:
+            translation = self.semaphore.run(deferToThread, self.translate_batch, texts, spider)
+        else:
+            translation = succeed({})
+        translation.addCallback(self.store)
+        translation.addErrback(lambda failure: spider.logger.error(f"Translation failed: {failure.value}"))
+        translation.addCallback(self.release, texts)
+        return translation
+
+    def lookup(self, text):
+        """
+            Look a translation up in the cache, then in the translation memory.
+
+            Returns:
+                str: The translation, or None if the text has not been translated yet.
+        """
+        if text in self.cache:
+            return self.cache[text]
+        row = self.memory.execute('SELECT translation FROM translations WHERE key = ?',
+                                  (hashlib.sha256(text.encode('utf-8')).hexdigest(),)).fetchone()
+        if row is not None:
+            self.cache[text] = row[0]
+            return row[0]
+        return None
+
+    def store(self, translations):
+        """
+            Save the translations of a batch in the cache and the translation memory.
+
+            Args:
+                translations (dict): Translations keyed by their Spanish text.
+        """
+        self.cache.update(translations)
+        with self.memory:
+            self.memory.executemany(
+                'INSERT OR REPLACE INTO translations (key, translation) VALUES (?, ?)',
+                [(hashlib.sha256(text.encode('utf-8')).hexdigest(), translation)
+                 for text, translation in translations.items()])
+
+    def translate_batch(self, texts, spider):
+        """
+            Translate a batch, retrying text by text when the whole batch fails, so a single
+            bad description or throttled call does not leave the rest of the batch in Spanish.
+
+            Args:
+                texts (list of str): Texts to translate.
+                spider: The spider whose items are translated, used for logging.
+
+            Returns:
+                dict: Translations keyed by their Spanish text, without the texts that failed.
+        """
+        try:
+            return dict(zip(texts, self.translate(texts)))
+        except Exception as e:
+            if len(texts) == 1:
+                spider.logger.error(f"Translation failed: {e}")
+                return {}
+            spider.logger.warning(f"Batch translation failed, retrying text by text: {e}")
+
+        translations = {}
+        for text in texts:
+            try:
+                translations[text] = self.translate([text])[0]
+            except Exception as e:
+                spider.logger.error(f"Translation failed: {e}")
+        return translations
+
+    def translate(self, texts):
+        """
+            Translate a batch of Spanish texts to English with the configured translator.
+
+            Args:
+                texts (list of str): Texts to translate.
+
+            Returns:
+                list of str: The translations, in the same order.
+        """
+        if isinstance(self.translator, LocalTranslator):
+            return self.translator.translate(texts)
+        return [translation.text for translation in self.translator.translate(texts, src='es', dest='en')]
+
+    def release(self, _, texts):
+        """
+            Fire the deferreds waiting for a translated batch with the cached translations.
+
+            Descriptions that failed to translate are kept in Spanish and are not cached,
+            so they are retried if they appear again.
+        """
+        for text in texts:
+            for deferred in self.inflight.pop(text):
+                deferred.callback(self.cache.get(text, text))
+
+    @staticmethod
+    def set_description(description, item):
+        """
+            Set the translated description on an item.
+
+            Returns:
+                The item, after processing.
+        """
+        item['description'] = description
+        return item
+
 class CsvPipeline:
     """
         Pipeline for exporting item data to a CSV file.
 
         This pipeline opens a CSV file at the start of the spider and writes item data in CSV format. 
-        It ensures that each item is written as a row in the CSV file when processed.
+        Each processed item becomes a row, rows are buffered and written in batches of CSV_BATCH_SIZE,
+        which can be overridden with the CSV_BATCH_SIZE setting.
     """
+    def __init__(self, batch_size=CSV_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.getint('CSV_BATCH_SIZE', CSV_BATCH_SIZE))
+
     def open_spider(self, spider):
         """
             Open a CSV file in the data directory and prepare it to write item data.
         """
         csv_path = os.path.join(data_dir, 'products.csv')
-        self.file = open(csv_path, 'w', newline='', encoding='utf8')
+        self.file = open(csv_path, 'w', newline='', encoding='utf8', buffering=1 << 20)
+        self.rows = []
         self.writer = csv.writer(self.file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
         self.writer.writerow(['product_id', 'title', 'brand', 'description', 'current_price', 'original_price',
                               'availability', 'image_urls', 'colors', 'sizes', 'category_path', 'url'])
 
     def close_spider(self, spider):
         """
-            Close the CSV file when the spider closes.
+            Write any buffered rows and close the CSV file when the spider closes.
         """
+        self.writer.writerows(self.rows)
+        self.rows.clear()
         self.file.close()
 
     def process_item(self, item, spider):
         """
-            Write an item to the CSV file.
+            Buffer an item as a CSV row, writing the buffered rows once the batch is full.
 
             Args:
                 item: The item scraped.
@@ -40,41 +313,41 @@ class CsvPipeline:
             Returns:
                 The item, after processing.
         """
-        self.writer.writerow([
+        self.rows.append([
             item['product_id'], item['title'], item['brand'], item['description'],
             item['current_price'], item['original_price'], item['availability'],
             '; '.join(item['image_urls']), item['colors'], ', '.join(item['sizes']),
             ' > '.join([item['category_path']]),
             item['url']
         ])
+        if len(self.rows) >= self.batch_size:
+            self.writer.writerows(self.rows)
+            self.rows.clear()
         return item
 
 class JsonPipeline:
     """
-        Pipeline for exporting item data to a JSON file.
+        Pipeline for exporting item data to a JSON Lines file.
 
-        This pipeline opens a JSON file at the start of the spider and writes items in JSON format.
-        It ensures the JSON format is maintained by adding appropriate commas and new lines.
+        This pipeline opens a JSON Lines file at the start of the spider and writes each item
+        as a single JSON object on its own line, so no array bookkeeping is needed.
     """
     def open_spider(self, spider):
         """
-            Open a JSON file in the data directory and prepare it to write item data.
+            Open a JSON Lines file in the data directory and prepare it to write item data.
         """
-        json_path = os.path.join(data_dir, 'products.json')
-        self.file = open(json_path, 'w')
-        self.file.write('[')
-        self.first_item = True
+        json_path = os.path.join(data_dir, 'products.jsonl')
+        self.file = open(json_path, 'wb', buffering=1 << 20)
 
     def close_spider(self, spider):
         """
-            Properly close the JSON file by appending a closing bracket.
+            Close the JSON Lines file when the spider closes.
         """
-        self.file.write(']')
         self.file.close()
 
     def process_item(self, item, spider):
         """
-            Write an item to the JSON file, formatted properly.
+            Write an item to the JSON Lines file as one line.
 
             Args:
                 item: The item scraped.
@@ -83,10 +356,5 @@ class JsonPipeline:
             Returns:
                 The item, after processing.
         """
-        line = json.dumps(dict(item), indent=4)
-        if not self.first_item:
-            self.file.write(',\n' + line)
-        else:
-            self.file.write(line)
-            self.first_item = False
+        self.file.write(orjson.dumps(dict(item)) + b'\n')
         return item
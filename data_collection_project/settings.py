@@ -53,6 +53,12 @@ ROBOTSTXT_OBEY = False
 #DOWNLOADER_MIDDLEWARES = {
 #    "data_collection_project.middlewares.DataCollectionProjectDownloaderMiddleware": 543,
 #}
+# Limit the requests in flight to each domain, releasing slots before the
+# redirect and retry middlewares (600 and 550) can schedule new requests
+DOWNLOADER_MIDDLEWARES = {
+    "data_collection_project.middlewares.PerDomainConcurrencyMiddleware": 650,
+}
+PER_DOMAIN_MAX_CONCURRENCY = 16
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -88,6 +94,10 @@ AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# Translate descriptions locally with a CTranslate2 model instead of googletrans
+# See data_collection_project.pipelines.LocalTranslator to build the model directory
+#TRANSLATION_MODEL_DIR = "es-en-ct2"
+
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
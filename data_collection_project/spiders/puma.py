@@ -1,5 +1,6 @@
 import scrapy
-import json
+import orjson
+from parsel.csstranslator import css2xpath
 from data_collection_project.items import PumaProductItem
 
 class PumaSpider(scrapy.Spider):
@@ -17,6 +18,9 @@ class PumaSpider(scrapy.Spider):
             custom_settings (dict): Defines settings specific to this spider, overriding 
                                     global settings defined in settings.py to try different
                                     pipelines for each spider.
+            grid_tile_xpath, analytics_xpath, product_link_xpath (str): XPath translations of
+                                    the CSS selectors used in `parse`, computed once for the
+                                    class instead of on every call.
     """
     name = "puma"
     allowed_domains = ["eu.puma.com"]
@@ -27,6 +31,10 @@ class PumaSpider(scrapy.Spider):
             'data_collection_project.pipelines.JsonPipeline': 300
         }
     }
+
+    grid_tile_xpath = css2xpath('div.grid-tile')
+    analytics_xpath = css2xpath('::attr(data-puma-analytics)')
+    product_link_xpath = css2xpath('a.product-tile-image-link::attr(href)')
     
     def __init__(self, *args, **kwargs):
         """
@@ -61,21 +69,21 @@ class PumaSpider(scrapy.Spider):
                 passed in the `meta` attribute.
         """
         # Extract product data and URLs
-        products = response.css('div.grid-tile')
+        products = response.xpath(self.grid_tile_xpath)
         for product in products:
             item = PumaProductItem()
-            data = product.css('::attr(data-puma-analytics)').get()
+            data = product.xpath(self.analytics_xpath).get()
             if data:
-                data = json.loads(data)
-                item['product_id'] = data['products'][0].get('productID', '')
-                item['title'] = data['products'][0].get('localName', 'No title')
-                item['current_price'] = data['products'][0].get('price', '0')
-                item['image_urls'] = data['products'][0].get('imageURL', [])
-                item['original_price'] = data['products'][0].get('listPrice', '0')
-                item['availability'] = data['products'][0].get('inStock', False)
-                item['colors'] = data['products'][0].get('colorName', 'Unknown')
-                item['category_path'] = f"{data['products'][0].get('productCategory', '')} > {data['products'][0].get('category', '')}"
-                item['url'] = response.urljoin(product.css('a.product-tile-image-link::attr(href)').get())
+                product_data = orjson.loads(data)['products'][0]
+                item['product_id'] = product_data.get('productID', '')
+                item['title'] = product_data.get('localName', 'No title')
+                item['current_price'] = product_data.get('price', '0')
+                item['image_urls'] = product_data.get('imageURL', [])
+                item['original_price'] = product_data.get('listPrice', '0')
+                item['availability'] = product_data.get('inStock', False)
+                item['colors'] = product_data.get('colorName', 'Unknown')
+                item['category_path'] = f"{product_data.get('productCategory', '')} > {product_data.get('category', '')}"
+                item['url'] = response.urljoin(product.xpath(self.product_link_xpath).get())
 
                 request = scrapy.Request(item['url'], callback=self.parse_product_details)
                 request.meta['item'] = item
@@ -111,9 +119,9 @@ class PumaSpider(scrapy.Spider):
         json_ld_string = response.xpath('//script[@type="application/ld+json"]/text()').get()
         if json_ld_string:
             try:
-                json_ld_data = json.loads(json_ld_string)
+                json_ld_data = orjson.loads(json_ld_string)
                 item['brand'] = json_ld_data.get('brand', 'Brand not found')
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 self.logger.error('Failed to decode JSON-LD data')
                 
         yield item
@@ -139,13 +147,12 @@ class PumaSpider(scrapy.Spider):
         sizes = []
         for json_str in json_strings:
             try:
-                json_data = json.loads(json_str)
-                if 'swatches' in json_data:
-                    for swatch in json_data['swatches']:
-                        if 'label' in swatch and swatch.get('available', 1):
-                            sizes.append(swatch['label'])
-            except json.JSONDecodeError:
+                json_data = orjson.loads(json_str)
+            except orjson.JSONDecodeError:
                 continue
+            swatches = json_data.get('swatches') if isinstance(json_data, dict) else None
+            if swatches:
+                sizes.extend(swatch['label'] for swatch in swatches if swatch.get('available', 1) and 'label' in swatch)
         return ', '.join(sizes)
 
     def handle_pagination(self, response):
@@ -1,7 +1,12 @@
+import re
 import scrapy
-import json
+import orjson
+from lxml import etree
+from parsel.csstranslator import css2xpath
 from data_collection_project.items import SaintLaurentProductItem
-from googletrans import Translator
+
+# Runs of whitespace collapsed to a single space in descriptions
+WHITESPACE_RE = re.compile(r'\s+')
 
 class SaintLaurentSpider(scrapy.Spider):
     """
@@ -15,7 +20,16 @@ class SaintLaurentSpider(scrapy.Spider):
             start_urls (list of str): Initial URLs to kick-off the crawling process.
             custom_settings (dict): Defines settings specific to this spider, overriding
                                     global settings defined in settings.py. This spider
-                                    uses a CSV pipeline for item storage.
+                                    uses a translation pipeline for descriptions and a
+                                    CSV pipeline for item storage, and caches responses on
+                                    disk for a day so reruns do not download pages again.
+            grid_url (str): Template of the paginated product grid URL, 12 products per page.
+            product_xpath, product_link_xpath, total_count_xpath, image_url_xpath,
+            description_xpath (str): XPath translations of the CSS
+                                    selectors used in `parse` and `parse_product_page`,
+                                    computed once for the class instead of on every call.
+            size_values_xpath (lxml.etree.XPath): Compiled XPath returning the size values
+                                    of a product page as plain strings.
     """
     name = 'saint_laurent'
     allowed_domains = ['ysl.com']
@@ -23,37 +37,64 @@ class SaintLaurentSpider(scrapy.Spider):
 
     custom_settings = {
         'ITEM_PIPELINES': {
+            'data_collection_project.pipelines.TranslationPipeline': 300,
             'data_collection_project.pipelines.CsvPipeline': 400
-        }
+        },
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+        'HTTPCACHE_EXPIRATION_SECS': 86400,
+        'HTTPCACHE_POLICY': 'scrapy.extensions.httpcache.RFC2616Policy'
     }
 
+    grid_url = 'https://www.ysl.com/on/demandware.store/Sites-SLP-WEUR-Site/es_ES/Search-UpdateGrid?cgid=sneakers-men&start={start}&sz=12'
+
+    product_xpath = css2xpath('article.c-product')
+    product_link_xpath = css2xpath('a.c-product__link::attr(href)')
+    total_count_xpath = css2xpath('[data-total-count]::attr(data-total-count)')
+    # Both the src and data-src attributes of the carousel images, in a single traversal
+    image_url_xpath = (css2xpath('div.c-productcarousel li.c-productcarousel__slide img') +
+                       '/@*[name()="src" or name()="data-src"]')
+    description_xpath = css2xpath('p.c-product__longdesc, ul.c-product__detailslist li')
+    size_values_xpath = etree.XPath('descendant-or-self::div[@data-ref="listbox"]//div[@role="option"]'
+                                    '[@data-attr-value and @data-attr-value != "RESET"]/@data-attr-value',
+                                    smart_strings=False)
+
     def parse(self, response):
         """
             Process each page loaded by the spider to extract and generate requests to
             individual product detail pages.
 
+            When the first page reports the total number of products, requests for every
+            grid page are generated at once so they are downloaded concurrently. Otherwise
+            each page requests the next one while it still has products.
+
             Args:
                 response (scrapy.http.Response): The response object to be processed.
             
             Yields:
-                scrapy.Request: A request to each product detail page, passing product data via meta.
+                scrapy.Request: A request to each product detail page, passing product data via meta,
+                and requests to the following grid pages.
         """
         # Extract product data and URLs
-        products = response.css('article.c-product')
+        products = response.xpath(self.product_xpath)
         for product in products:
-            product_data = json.loads(product.attrib['data-gtmproduct']) if 'data-gtmproduct' in product.attrib else {}
-            product_url = response.urljoin(product.css('a.c-product__link::attr(href)').get())
+            product_data = orjson.loads(product.attrib['data-gtmproduct']) if 'data-gtmproduct' in product.attrib else {}
+            product_url = response.urljoin(product.xpath(self.product_link_xpath).get())
 
             request = scrapy.Request(product_url, callback=self.parse_product_page)
             request.meta['product_data'] = product_data
             request.meta['product_url'] = product_url
             yield request
 
-        # Pagination logic
-        if products:
+        # Pagination logic, fanning out from the first page when the total is known
+        total_count = response.xpath(self.total_count_xpath).get() if 'start' not in response.meta else None
+        if total_count and total_count.isdigit():
+            for next_start in range(12, int(total_count), 12):
+                yield scrapy.Request(self.grid_url.format(start=next_start), callback=self.parse,
+                                     meta={'start': next_start, 'fan_out': True})
+        elif products and not response.meta.get('fan_out'):
             next_start = response.meta.get('start', 0) + 12
-            next_page_url = f'https://www.ysl.com/on/demandware.store/Sites-SLP-WEUR-Site/es_ES/Search-UpdateGrid?cgid=sneakers-men&start={next_start}&sz=12'
-            yield scrapy.Request(next_page_url, callback=self.parse, meta={'start': next_start})
+            yield scrapy.Request(self.grid_url.format(start=next_start), callback=self.parse, meta={'start': next_start})
 
     def parse_product_page(self, response):
         """
@@ -69,30 +110,17 @@ class SaintLaurentSpider(scrapy.Spider):
         product_data = response.meta['product_data']
         product_url = response.meta['product_url']
 
-        # Extract and set image URLs, filtering out placeholders
-        image_urls = set(
-            response.css('div.c-productcarousel li.c-productcarousel__slide img::attr(src)').getall() +
-            response.css('div.c-productcarousel li.c-productcarousel__slide img::attr(data-src)').getall()
-        )
-        image_urls = {url for url in image_urls if url and 'placeholder' not in url}
-
-        # Extract the full product description and translate it
-        description_elements = response.css('p.c-product__longdesc, ul.c-product__detailslist li')
-        full_description = ' '.join(description_elements.css('::text').getall())
-        full_description = ' '.join(full_description.split())
-
-        # Initialize description translator
-        translator = Translator()
+        # Extract image URLs in page order without duplicates, filtering out placeholders
+        image_urls = list(dict.fromkeys(url for url in response.xpath(self.image_url_xpath).getall()
+                                        if url and 'placeholder' not in url))
 
-        try:
-            translated_description = translator.translate(full_description, src='es', dest='en').text
-        except Exception as e:
-            self.logger.error(f"Translation failed: {e}")
-            translated_description = full_description
+        # Extract the full product description, translated later by TranslationPipeline
+        description_elements = response.xpath(self.description_xpath)
+        description_text = (text for element in description_elements for text in element.root.itertext())
+        full_description = WHITESPACE_RE.sub(' ', ' '.join(description_text)).strip()
 
         # Sizes extraction
-        size_elements = response.css('div[data-ref="listbox"] div[role="option"][data-attr-value]:not([data-attr-value="RESET"])')
-        sizes = [elem.attrib['data-attr-value'] for elem in size_elements]
+        sizes = self.size_values_xpath(response.selector.root)
 
         # Handling the 'price' to replace None or null value with 'N/A'
         original_price = product_data.get('price') if product_data.get('price') is not None else 'N/A'
@@ -102,11 +130,11 @@ class SaintLaurentSpider(scrapy.Spider):
             product_id=product_data.get('id', ''),
             title=product_data.get('name', ''),
             brand=product_data.get('brand', ''),
-            description=translated_description,
+            description=full_description,
             current_price=product_data.get('discountPrice', ''),
             original_price=original_price,
             availability=product_data.get('stock', ''),
-            image_urls=list(image_urls),
+            image_urls=image_urls,
             colors=product_data.get('color', ''),
             sizes=sizes,
             category_path=' > '.join([
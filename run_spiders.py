@@ -3,8 +3,24 @@ from scrapy.utils.project import get_project_settings
 from data_collection_project.spiders.puma import PumaSpider
 from data_collection_project.spiders.saintlaurent import SaintLaurentSpider
 
+# Broad-crawl settings for running both spiders concurrently in one reactor
+CRAWL_SETTINGS = {
+    'DOWNLOAD_TIMEOUT': 15,
+    'DNS_TIMEOUT': 5,
+    'DNSCACHE_ENABLED': True,
+    'DNSCACHE_SIZE': 100000,
+    'SCHEDULER_PRIORITY_QUEUE': 'scrapy.pqueues.DownloaderAwarePriorityQueue',
+    'CONCURRENT_REQUESTS': 128,
+    'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+    'REACTOR_THREADPOOL_MAXSIZE': 40,
+    'AUTOTHROTTLE_ENABLED': True,
+    'AUTOTHROTTLE_TARGET_CONCURRENCY': 8.0,
+}
+
 def run_spiders():
-    process = CrawlerProcess(get_project_settings())
+    settings = get_project_settings()
+    settings.update(CRAWL_SETTINGS)
+    process = CrawlerProcess(settings)
     process.crawl(PumaSpider)
     process.crawl(SaintLaurentSpider)
     process.start()